@@ -3,6 +3,7 @@
 Generate PDF documentation for MoldWing Real-time Texture Editing System
 """
 
+import reportlab
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm, mm
@@ -13,8 +14,9 @@ from reportlab.platypus import (
     Table, TableStyle, Image, ListFlowable, ListItem
 )
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
 from reportlab.graphics.shapes import Drawing, Rect, Line, String, Circle, Polygon
-from reportlab.graphics import renderPDF
+from reportlab.graphics import renderPDF, renderPM
 
 # Register Chinese fonts
 from reportlab.pdfbase import pdfmetrics
@@ -22,6 +24,9 @@ from reportlab.pdfbase.ttfonts import TTFont
 
 # Try to register Chinese fonts (Windows)
 import os
+import glob
+import hashlib
+import inspect
 FONT_PATHS = [
     'C:/Windows/Fonts/msyh.ttc',      # Microsoft YaHei
     'C:/Windows/Fonts/simsun.ttc',    # SimSun
@@ -31,24 +36,62 @@ FONT_PATHS = [
 CHINESE_FONT = 'Helvetica'  # Fallback
 CHINESE_FONT_BOLD = 'Helvetica-Bold'
 
-for font_path in FONT_PATHS:
-    if os.path.exists(font_path):
+_RESOLVED_FONT = None
+
+def _resolve_chinese_font():
+    """Register the first available Chinese font once per process (lazy)"""
+    global _RESOLVED_FONT, CHINESE_FONT, CHINESE_FONT_BOLD
+    if _RESOLVED_FONT is not None:
+        return _RESOLVED_FONT
+
+    _RESOLVED_FONT = ('Helvetica', 'Helvetica-Bold')
+    for font_path in FONT_PATHS:
+        if not os.path.exists(font_path):
+            continue
         try:
             pdfmetrics.registerFont(TTFont('ChineseFont', font_path))
-            CHINESE_FONT = 'ChineseFont'
-            CHINESE_FONT_BOLD = 'ChineseFont'  # TTF may not have bold variant
+            _RESOLVED_FONT = ('ChineseFont', 'ChineseFont')  # TTF may not have bold variant
             print(f"Registered Chinese font: {font_path}")
             break
         except Exception as e:
             print(f"Failed to register {font_path}: {e}")
             continue
 
+    CHINESE_FONT, CHINESE_FONT_BOLD = _RESOLVED_FONT
+    return _RESOLVED_FONT
+
 # Page setup
 PAGE_WIDTH, PAGE_HEIGHT = A4
 MARGIN = 2 * cm
 
+# Output
+OUTPUT_PDF = "d:/codes/cpp/MoldWing/Docs/MoldWing-Texture-Edit-Technical-v2.pdf"
+OUTPUT_HASH = OUTPUT_PDF + ".hash"
+
+def compute_build_key():
+    """Hash the script source, ReportLab setup and available fonts to detect unchanged inputs"""
+    h = hashlib.blake2b()
+    with open(__file__, 'rb') as f:
+        h.update(f.read())
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            h.update(font_path.encode('utf-8'))
+    # Diagrams are embedded as PNGs only when a renderPM backend is present.
+    # The probe is a single 1x1 render, cached for the rest of the build.
+    h.update(reportlab.Version.encode('ascii'))
+    h.update(b'png' if png_backend_available() else b'vector')
+    return h.hexdigest()
+
+def is_up_to_date(key):
+    """Check whether the existing PDF was built from the same inputs"""
+    if not os.path.exists(OUTPUT_PDF) or not os.path.exists(OUTPUT_HASH):
+        return False
+    with open(OUTPUT_HASH, 'r', encoding='ascii') as f:
+        return f.read().strip() == key
+
 def create_styles():
     """Create custom paragraph styles"""
+    _resolve_chinese_font()
     styles = getSampleStyleSheet()
 
     # Title style
@@ -107,6 +150,29 @@ def create_styles():
         leading=14
     ))
 
+    # TOC entries
+    styles.add(ParagraphStyle(
+        name='TOCFlush',
+        parent=styles['BodyTextCustom'],
+        fontName=CHINESE_FONT,
+        leftIndent=0
+    ))
+
+    styles.add(ParagraphStyle(
+        name='TOCIndent',
+        parent=styles['BodyTextCustom'],
+        fontName=CHINESE_FONT,
+        leftIndent=20
+    ))
+
+    # Algorithm steps
+    styles.add(ParagraphStyle(
+        name='StepIndent',
+        parent=styles['BodyTextCustom'],
+        fontName=CHINESE_FONT,
+        leftIndent=15
+    ))
+
     # Code style
     styles.add(ParagraphStyle(
         name='CodeBlock',
@@ -145,6 +211,18 @@ def create_styles():
 
     return styles
 
+def list_table_style(style):
+    """Table style for one-line list entries, taking spacing from a paragraph style"""
+    return [
+        ('FONTNAME', (0, 0), (-1, -1), style.fontName),
+        ('FONTSIZE', (0, 0), (-1, -1), style.fontSize),
+        ('LEADING', (0, 0), (-1, -1), style.leading),
+        ('LEFTPADDING', (0, 0), (-1, -1), style.leftIndent),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), style.spaceAfter),
+    ]
+
 def create_flow_diagram():
     """Create a data flow diagram"""
     d = Drawing(450, 200)
@@ -216,21 +294,63 @@ def create_coordinate_diagram():
 
     return d
 
-def build_document():
-    """Build the complete PDF document"""
-    doc = SimpleDocTemplate(
-        "d:/codes/cpp/MoldWing/Docs/MoldWing-Texture-Edit-Technical-v2.pdf",
-        pagesize=A4,
-        leftMargin=MARGIN,
-        rightMargin=MARGIN,
-        topMargin=MARGIN,
-        bottomMargin=MARGIN
-    )
+DIAGRAM_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'diagram_cache')
+DIAGRAM_DPI = 200
 
-    styles = create_styles()
+_PNG_BACKEND_AVAILABLE = None
+
+def png_backend_available():
+    """Check once per process whether renderPM can write PNGs (needs rlPyCairo)"""
+    global _PNG_BACKEND_AVAILABLE
+    if _PNG_BACKEND_AVAILABLE is None:
+        try:
+            renderPM.drawToString(Drawing(1, 1), fmt='PNG')
+            _PNG_BACKEND_AVAILABLE = True
+        except Exception:
+            _PNG_BACKEND_AVAILABLE = False
+    return _PNG_BACKEND_AVAILABLE
+
+def cached_diagram(create_fn):
+    """Return a diagram as an Image from a PNG cache, rendering it on first use.
+
+    The cache key hashes the generator's source and DIAGRAM_DPI, so editing
+    the diagram or the resolution invalidates the PNG. Falls back to the
+    vector Drawing if no renderPM backend is available.
+    """
+    if not png_backend_available():
+        return create_fn()
+
+    h = hashlib.blake2b(digest_size=8)
+    h.update(inspect.getsource(create_fn).encode('utf-8'))
+    h.update(str(DIAGRAM_DPI).encode('ascii'))
+    png_path = os.path.join(DIAGRAM_CACHE_DIR, f"{create_fn.__name__}.{h.hexdigest()}.png")
+
+    if not os.path.exists(png_path):
+        drawing = create_fn()
+        tmp_path = f"{png_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(DIAGRAM_CACHE_DIR, exist_ok=True)
+            renderPM.drawToFile(drawing, tmp_path, fmt='PNG', dpi=DIAGRAM_DPI)
+            os.replace(tmp_path, png_path)
+            # Drop PNGs rendered from older versions of this diagram
+            for stale_path in glob.glob(os.path.join(DIAGRAM_CACHE_DIR, f"{create_fn.__name__}.*.png")):
+                if stale_path != png_path:
+                    os.remove(stale_path)
+        except Exception as e:
+            print(f"Failed to cache {create_fn.__name__}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return drawing
+
+    # Scale pixels back to points and keep the Drawing's left alignment
+    width, height = ImageReader(png_path).getSize()
+    scale = 72.0 / DIAGRAM_DPI
+    return Image(png_path, width=width * scale, height=height * scale, hAlign='LEFT')
+
+def build_title_page(styles):
+    """Build the title page with project info table"""
     story = []
 
-    # ========== TITLE PAGE ==========
     story.append(Spacer(1, 3*cm))
     story.append(Paragraph("MoldWing 实时纹理编辑系统", styles['DocTitle']))
     story.append(Paragraph("技术实现文档", styles['Subtitle']))
@@ -260,7 +380,12 @@ def build_document():
 
     story.append(PageBreak())
 
-    # ========== TABLE OF CONTENTS ==========
+    return story
+
+def build_toc(styles):
+    """Build the table of contents"""
+    story = []
+
     story.append(Paragraph("目录", styles['SectionHeader']))
     toc_items = [
         "1. 系统概述",
@@ -280,14 +405,23 @@ def build_document():
         "6. 撤销/重做系统",
         "7. 完整数据流程",
     ]
-    for item in toc_items:
-        indent = 20 if item.startswith("    ") else 0
-        story.append(Paragraph(item.strip(),
-                              ParagraphStyle('TOC', parent=styles['BodyTextCustom'], fontName=CHINESE_FONT, leftIndent=indent)))
+    toc_table = Table([[item.strip()] for item in toc_items],
+                      colWidths=[PAGE_WIDTH - 2*MARGIN], hAlign='LEFT')
+    toc_table.setStyle(TableStyle(
+        list_table_style(styles['TOCFlush']) +
+        [('LEFTPADDING', (0, i), (0, i), styles['TOCIndent'].leftIndent)
+         for i, item in enumerate(toc_items) if item.startswith("    ")]
+    ))
+    story.append(toc_table)
 
     story.append(PageBreak())
 
-    # ========== SECTION 1: OVERVIEW ==========
+    return story
+
+def build_section_1(styles):
+    """Build section 1: system overview"""
+    story = []
+
     story.append(Paragraph("1. 系统概述", styles['SectionHeader']))
 
     story.append(Paragraph(
@@ -303,8 +437,10 @@ def build_document():
         "保持原生纹理分辨率 - 实际编辑在纹理空间进行",
         "支持撤销/重做 - 完整的编辑历史管理"
     ]
-    for adv in advantages:
-        story.append(Paragraph(f"• {adv}", styles['BodyTextCustom']))
+    story.append(ListFlowable(
+        [ListItem(Paragraph(adv, styles['BodyTextCustom'])) for adv in advantages],
+        bulletType='bullet', start='•', leftIndent=10, bulletFontName=CHINESE_FONT, bulletFontSize=10
+    ))
 
     story.append(Spacer(1, 0.5*cm))
     story.append(Paragraph("<b>核心组件架构：</b>", styles['BodyTextCustom']))
@@ -333,7 +469,12 @@ def build_document():
 
     story.append(PageBreak())
 
-    # ========== SECTION 2: SCREEN TO TEXTURE MAPPING ==========
+    return story
+
+def build_section_2(styles):
+    """Build section 2: screen to texture mapping"""
+    story = []
+
     story.append(Paragraph("2. 屏幕空间到纹理空间映射", styles['SectionHeader']))
 
     story.append(Paragraph(
@@ -343,7 +484,7 @@ def build_document():
 
     # Data flow diagram
     story.append(Spacer(1, 0.3*cm))
-    story.append(create_flow_diagram())
+    story.append(cached_diagram(create_flow_diagram))
     story.append(Paragraph("图1: 屏幕到纹理坐标的转换流程", styles['FigCaption']))
 
     # 2.1 Face Picking
@@ -391,15 +532,17 @@ def build_document():
         "9. 计算距离 t = (E2 · Q) / det",
         "10. 验证: u ≥ 0, v ≥ 0, u + v ≤ 1, t > 0"
     ]
-    for step in algo_steps:
-        story.append(Paragraph(step, ParagraphStyle('Step', parent=styles['BodyTextCustom'], fontName=CHINESE_FONT, leftIndent=15)))
+    steps_table = Table([[step] for step in algo_steps],
+                        colWidths=[PAGE_WIDTH - 2*MARGIN], hAlign='LEFT')
+    steps_table.setStyle(TableStyle(list_table_style(styles['StepIndent'])))
+    story.append(steps_table)
 
     story.append(PageBreak())
 
     # 2.3 Barycentric Coordinates
     story.append(Paragraph("2.3 重心坐标计算", styles['SubsectionHeader']))
 
-    story.append(create_coordinate_diagram())
+    story.append(cached_diagram(create_coordinate_diagram))
     story.append(Paragraph("图2: 三角形内任意点P的重心坐标表示", styles['FigCaption']))
 
     story.append(Paragraph(
@@ -438,7 +581,12 @@ def build_document():
 
     story.append(PageBreak())
 
-    # ========== SECTION 3: TEXTURE EDIT BUFFER ==========
+    return story
+
+def build_section_3(styles):
+    """Build section 3: CPU texture edit buffer"""
+    story = []
+
     story.append(Paragraph("3. CPU纹理编辑缓冲区", styles['SectionHeader']))
 
     story.append(Paragraph("3.1 TextureEditBuffer 设计", styles['SubsectionHeader']))
@@ -496,7 +644,12 @@ def build_document():
 
     story.append(PageBreak())
 
-    # ========== SECTION 4: GPU UPDATE ==========
+    return story
+
+def build_section_4(styles):
+    """Build section 4: GPU texture update"""
+    story = []
+
     story.append(Paragraph("4. GPU纹理实时更新", styles['SectionHeader']))
 
     story.append(Paragraph(
@@ -543,7 +696,12 @@ def build_document():
 
     story.append(PageBreak())
 
-    # ========== SECTION 5: CLONE STAMP ==========
+    return story
+
+def build_section_5(styles):
+    """Build section 5: clone stamp algorithm"""
+    story = []
+
     story.append(Paragraph("5. 克隆图章算法", styles['SectionHeader']))
 
     story.append(Paragraph(
@@ -616,7 +774,12 @@ def build_document():
 
     story.append(PageBreak())
 
-    # ========== SECTION 6: UNDO/REDO ==========
+    return story
+
+def build_section_6(styles):
+    """Build section 6: undo/redo system"""
+    story = []
+
     story.append(Paragraph("6. 撤销/重做系统", styles['SectionHeader']))
 
     story.append(Paragraph(
@@ -673,7 +836,12 @@ def build_document():
 
     story.append(PageBreak())
 
-    # ========== SECTION 7: COMPLETE FLOW ==========
+    return story
+
+def build_section_7(styles):
+    """Build section 7: complete data flow"""
+    story = []
+
     story.append(Paragraph("7. 完整数据流程", styles['SectionHeader']))
 
     story.append(Paragraph(
@@ -735,9 +903,47 @@ def build_document():
                       fontName=CHINESE_FONT, fontSize=8, textColor=gray, alignment=TA_CENTER)
     ))
 
+    return story
+
+# Document sections in output order
+SECTION_BUILDERS = [
+    build_title_page,
+    build_toc,
+    build_section_1,
+    build_section_2,
+    build_section_3,
+    build_section_4,
+    build_section_5,
+    build_section_6,
+    build_section_7,
+]
+
+def build_document():
+    """Build the complete PDF document"""
+    key = compute_build_key()
+    if is_up_to_date(key):
+        print(f"PDF up to date: {OUTPUT_PDF}")
+        return
+
+    doc = SimpleDocTemplate(
+        OUTPUT_PDF,
+        pagesize=A4,
+        leftMargin=MARGIN,
+        rightMargin=MARGIN,
+        topMargin=MARGIN,
+        bottomMargin=MARGIN
+    )
+
+    styles = create_styles()
+    story = [flowable for builder in SECTION_BUILDERS for flowable in builder(styles)]
+
     # Build PDF
     doc.build(story)
-    print("PDF generated: d:/codes/cpp/MoldWing/Docs/MoldWing-Texture-Edit-Technical-v2.pdf")
+    tmp_hash = f"{OUTPUT_HASH}.{os.getpid()}.tmp"
+    with open(tmp_hash, 'w', encoding='ascii') as f:
+        f.write(key)
+    os.replace(tmp_hash, OUTPUT_HASH)
+    print(f"PDF generated: {OUTPUT_PDF}")
 
 if __name__ == "__main__":
     build_document()